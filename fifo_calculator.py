@@ -1,10 +1,201 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
+import numpy as np
 import pandas as pd
-from collections import deque
 import os
+import queue
+import re
+import threading
+
+try:
+    import numba as nb
+except ImportError: # numba is optional; the NumPy matcher is used without it
+    nb = None
+
+# --- Core FIFO Logic (Vectorized) ---
+
+# Fractional quantities are matched in whole ten-thousandths of a share, or
+# hundred-millionths when the file is more precise than that
+_QTY_SCALES = (10_000, 100_000_000)
+
+def _match_lots(code_ids, is_buy, is_sell, qty):
+    """
+    Matches sells against buy lots in FIFO order, separately for each stock code.
+
+    Sells are only matched against lots bought before them; any quantity sold
+    beyond the shares held at that point is left unmatched, as before.
+
+    Args:
+        code_ids (np.ndarray): Integer stock code id of each transaction, in date order.
+        is_buy (np.ndarray): Boolean mask of buy transactions.
+        is_sell (np.ndarray): Boolean mask of sell transactions.
+        qty (np.ndarray): Quantity of each transaction.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            - Sell row for each matched portion.
+            - Buy row for each matched portion.
+            - Quantity of each matched portion.
+            - Buy row of every lot, grouped by code.
+            - Quantity left unsold in each of those lots.
+    """
+    # Group rows by code in one stable sort, keeping date order within each code
+    order = np.argsort(code_ids, kind='stable')
+    group_starts = np.flatnonzero(np.diff(code_ids[order], prepend=-1))
+    bought = np.where(is_buy, qty, 0)[order]
+    held = np.cumsum(bought)
+
+    # Lots are laid end to end, so code c's lots fill [buy_base[c], buy_base[c] + code_bought[c])
+    code_bought = np.add.reduceat(bought, group_starts)
+    buy_base = np.cumsum(code_bought) - code_bought
+    code_lots = np.add.reduceat(is_buy[order], group_starts)
+    last_lot = np.cumsum(code_lots) - 1
+    first_lot = last_lot + 1 - code_lots
+
+    lot_rows = order[is_buy[order]]
+    lot_qty = qty[lot_rows]
+    cum_lot = np.cumsum(lot_qty)
+
+    sell_pos = np.flatnonzero(is_sell[order])
+    sell_rows = order[sell_pos]
+    sell_qty = qty[sell_rows]
+    sell_code = code_ids[sell_rows]
+    code_sold = np.add.reduceat(np.where(is_sell, qty, 0)[order], group_starts)
+    cum_sell = np.cumsum(sell_qty) - (np.cumsum(code_sold) - code_sold)[sell_code]
+    code_first_sell = np.diff(sell_code, prepend=-1) != 0
+
+    # Total quantity matched after each sell, capped by what was held at the time
+    shortfall = pd.Series(held[sell_pos] - buy_base[sell_code] - cum_sell).groupby(sell_code).cummin()
+    sold_to = cum_sell + np.minimum(shortfall.to_numpy(), 0)
+    sold_from = np.where(code_first_sell, 0, np.concatenate(([0], sold_to[:-1])).astype(sold_to.dtype))
+    matched = sold_to > sold_from
+    sold_from = sold_from + buy_base[sell_code]
+    sold_to = sold_to + buy_base[sell_code]
+
+    # Span of buy lots [lo, hi] consumed by each sell, kept within the sell's own code
+    lo = np.maximum(np.searchsorted(cum_lot, sold_from, side='right'), first_lot[sell_code])
+    hi = np.minimum(np.searchsorted(cum_lot, sold_to, side='left'), last_lot[sell_code])
+    n_portions = np.where(matched, np.maximum(hi - lo + 1, 0), 0)
+
+    # Expand each sell into one portion per buy lot it touches
+    sell_idx = np.repeat(np.arange(len(sell_rows)), n_portions)
+    offsets = np.arange(n_portions.sum()) - np.repeat(np.cumsum(n_portions) - n_portions, n_portions)
+    lot_idx = lo[sell_idx] + offsets
+    lot_end = cum_lot[lot_idx]
+    lot_start = lot_end - lot_qty[lot_idx]
+    portion_qty = np.minimum(sold_to[sell_idx], lot_end) - np.maximum(sold_from[sell_idx], lot_start)
+
+    # Whatever lies beyond each code's last matched share is still held
+    sold_end = buy_base.copy()
+    code_last_sell = np.diff(sell_code, append=-1) != 0
+    sold_end[sell_code[code_last_sell]] = sold_to[code_last_sell]
+    remaining_qty = np.clip(cum_lot - sold_end[code_ids[lot_rows]], 0, lot_qty)
+
+    return sell_rows[sell_idx], lot_rows[lot_idx], portion_qty, lot_rows, remaining_qty
+
+
+def _fifo_kernel(code_ids, is_buy, is_sell, qty):
+    """
+    Sequential FIFO walk over the transactions, compiled with numba when available.
+
+    Produces the same results as `_match_lots`, but keeps each code's open lots
+    in a slice of flat arrays with a head/tail cursor instead of a deque.
+    """
+    n = len(qty)
+    n_codes = code_ids.max() + 1 if n else 0
+
+    # Give each code a contiguous run of lot slots, sized to its number of buys
+    head = np.zeros(n_codes, np.int64)
+    for i in range(n):
+        if is_buy[i]:
+            head[code_ids[i]] += 1
+    n_lots = 0
+    for c in range(n_codes):
+        code_lots = head[c]
+        head[c] = n_lots
+        n_lots += code_lots
+    tail = head.copy()
+    lot_row = np.empty(n_lots, np.int64)
+    lot_qty = np.empty(n_lots, qty.dtype)
+
+    # Every portion either finishes a sell or uses up a lot, so n portions is an upper bound
+    out_sell = np.empty(n, np.int64)
+    out_buy = np.empty(n, np.int64)
+    out_qty = np.empty(n, qty.dtype)
+    k = 0
+
+    for i in range(n):
+        c = code_ids[i]
+        if is_buy[i]:
+            lot_row[tail[c]] = i
+            lot_qty[tail[c]] = qty[i]
+            tail[c] += 1
+        elif is_sell[i]:
+            quantity_to_sell = qty[i]
+            while quantity_to_sell > 0 and head[c] < tail[c]:
+                oldest = head[c]
+                match_quantity = min(quantity_to_sell, lot_qty[oldest])
+                if match_quantity > 0:
+                    out_sell[k] = i
+                    out_buy[k] = lot_row[oldest]
+                    out_qty[k] = match_quantity
+                    k += 1
+                quantity_to_sell -= match_quantity
+                lot_qty[oldest] -= match_quantity
+                if lot_qty[oldest] == 0:
+                    head[c] += 1
+
+    return out_sell[:k], out_buy[:k], out_qty[:k], lot_row, lot_qty
+
+
+if nb is not None:
+    try:
+        _fifo_kernel = nb.njit(cache=True)(_fifo_kernel)
+    except RuntimeError:
+        # Frozen (PyInstaller) builds have no source file to cache against
+        _fifo_kernel = nb.njit(_fifo_kernel)
+
+
+def _parse_dates(dates):
+    """
+    Parses the Date column in a single pass, picking the format from a sample value.
+
+    ISO dates (2023-01-31) get pandas' fast ISO8601 parser. Slash dates are read
+    month-first unless a leading field over 12 shows they are day-first, which is
+    what trying month-first and retrying with dayfirst=True used to work out with
+    two full parses.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates # Excel readers already return datetimes
+
+    sample = str(dates.dropna().iat[0]) if dates.notna().any() else ''
+    if re.match(r'\s*\d{4}-\d{1,2}-\d{1,2}', sample):
+        return pd.to_datetime(dates, format='ISO8601')
+    if re.match(r'\s*\d{1,2}/\d{1,2}/', sample):
+        leading = pd.to_numeric(dates.astype(str).str.extract(r'^\s*(\d{1,2})/', expand=False))
+        return pd.to_datetime(dates, dayfirst=bool(leading.max() > 12))
+
+    try:
+        return pd.to_datetime(dates)
+    except Exception:
+        return pd.to_datetime(dates, dayfirst=True)
+
+
+def _round_cents(values):
+    """
+    Rounds money values to cents exactly as Python's round(x, 2) does.
+
+    np.round scales by 100 before rounding, which can tip a value stored just
+    under a half cent (7.295 is really 7.29499...) up to 7.30. Values that close
+    to a half cent are re-rounded with round(), so reports keep their old cents.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[near_half] = [round(value, 2) for value in values[near_half].tolist()]
+    return rounded
 
-# --- Core FIFO Logic (Improved) ---
 
 def calculate_fifo_profit_loss(df):
     """
@@ -20,91 +211,94 @@ def calculate_fifo_profit_loss(df):
             - A DataFrame of remaining unsold holdings.
     """
     # 1. Data Preparation
-    try:
-        df['Date'] = pd.to_datetime(df['Date'])
-    except Exception:
-        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
-        
-    df.sort_values(by='Date', inplace=True)
-    df.reset_index(inplace=True) # Use original index as a unique ID for buys
+    trade_dates = _parse_dates(df['Date'])
 
-    all_realized_gains = []
-    all_holdings = {} # Using a dict to store deques for each stock code
+    # Blank fees count as zero, and a stable sort keeps same-day trades in file order.
+    # Building a new frame also leaves the caller's DataFrame untouched
+    df = df.assign(Date=trade_dates, Fees=df['Fees'].fillna(0.0)).sort_values(
+        'Date', kind='mergesort', ignore_index=True
+    )
 
-    for index, row in df.iterrows():
-        code = row['Code']
-        
-        # Initialize a queue for the stock code if not present
-        if code not in all_holdings:
-            all_holdings[code] = deque()
-
-        if row['Type'].lower() == 'buy':
-            # Add purchase lot to the specific code's queue
-            cost_per_share = row['Price'] + (row['Fees'] / row['Quantity'])
-            all_holdings[code].append({
-                'original_index': index,
-                'quantity': row['Quantity'],
-                'cost_per_share': cost_per_share,
-                'buy_date': row['Date']
-            })
-
-        elif row['Type'].lower() == 'sell':
-            quantity_to_sell = row['Quantity']
-            sell_price_per_share = row['Price']
-            sell_fees = row['Fees']
-            sell_date = row['Date']
-            
-            # Apportion sell fees across the shares being sold
-            fee_per_share_sold = sell_fees / quantity_to_sell if quantity_to_sell else 0
-
-            # Get the buy queue for the current stock
-            buy_queue = all_holdings[code]
-
-            while quantity_to_sell > 0 and buy_queue:
-                oldest_buy = buy_queue[0]
-                
-                match_quantity = min(quantity_to_sell, oldest_buy['quantity'])
-                
-                # Calculate profit/loss for this specific portion
-                proceeds = match_quantity * (sell_price_per_share - fee_per_share_sold)
-                cost_basis = match_quantity * oldest_buy['cost_per_share']
-                profit_loss = proceeds - cost_basis
-                
-                # Store the detailed result for this matched part of the sale
-                all_realized_gains.append({
-                    'Sell Date': sell_date,
-                    'Code': code,
-                    'Quantity Sold': match_quantity,
-                    'Sell Price': sell_price_per_share,
-                    'Proceeds': round(proceeds, 2),
-                    'Acquisition Date': oldest_buy['buy_date'],
-                    'Cost Basis per Share': round(oldest_buy['cost_per_share'], 2),
-                    'Total Cost Basis': round(cost_basis, 2),
-                    'Profit/Loss': round(profit_loss, 2)
-                })
-                
-                # Decrement quantities
-                quantity_to_sell -= match_quantity
-                oldest_buy['quantity'] -= match_quantity
-                
-                # If the entire oldest buy lot is sold, remove it from the queue
-                if oldest_buy['quantity'] == 0:
-                    buy_queue.popleft()
-
-    # 2. Prepare Remaining Holdings Report
-    remaining_holdings_list = []
-    for code, buy_queue in all_holdings.items():
-        for holding in buy_queue:
-            if holding['quantity'] > 0: # Ensure we only report lots with shares left
-                remaining_holdings_list.append({
-                    'Code': code,
-                    'Remaining Quantity': holding['quantity'],
-                    'Acquisition Date': holding['buy_date'],
-                    'Cost Basis per Share': round(holding['cost_per_share'], 2)
-                })
-
-    sales_df = pd.DataFrame(all_realized_gains)
-    holdings_df = pd.DataFrame(remaining_holdings_list)
+    # Pull each column out once as a NumPy array; no per-row Series objects
+    code_ids, codes = pd.factorize(df['Code'], use_na_sentinel=False)
+    # Normalize each distinct transaction type once instead of once per row, so
+    # "Buy", "BUY" and " buy " all count as buys. An empty column can come back
+    # with float labels, so they are made strings first
+    type_ids, type_labels = pd.factorize(df['Type'], use_na_sentinel=False)
+    type_labels = type_labels.astype(str).str.strip().str.lower()
+    is_buy = (type_labels == 'buy')[type_ids]
+    is_sell = (type_labels == 'sell')[type_ids]
+    dates = df['Date'].to_numpy()
+    qty = pd.to_numeric(df['Quantity']).to_numpy()
+    price = pd.to_numeric(df['Price']).to_numpy()
+    fees = pd.to_numeric(df['Fees']).to_numpy()
+
+    # Per-share fees and buy cost for every row, computed once up front
+    fee_per_share = np.divide(fees, qty, out=np.zeros(len(qty)), where=qty != 0)
+    cost_per_share = price + fee_per_share
+
+    # Match on int64 share units so lot and sale sizes add up exactly and a used-up
+    # lot is recognised by an exact compare; whole-share input needs no scaling.
+    # Quantities finer than every scale are matched as given rather than rounded off
+    qty_scale = 1
+    qty_units = np.nan_to_num(qty)
+    if not np.issubdtype(qty.dtype, np.integer):
+        for scale in _QTY_SCALES:
+            scaled = qty_units * scale
+            whole_units = np.round(scaled)
+            if np.allclose(scaled, whole_units, rtol=0, atol=1e-6):
+                qty_scale = scale
+                qty_units = whole_units.astype(np.int64)
+                break
+
+    # 2. FIFO matching across all codes in a single pass. _match_lots needs exact
+    # cumulative sums, so quantities left as floats take the sequential walk
+    if nb is None and np.issubdtype(qty_units.dtype, np.integer):
+        match_lots = _match_lots
+    else:
+        match_lots = _fifo_kernel
+    sell_rows, buy_rows, portion_units, lot_rows, lot_units = match_lots(code_ids, is_buy, is_sell, qty_units)
+    portion_qty = (portion_units / qty_scale).astype(qty.dtype)
+    lot_remaining = (lot_units / qty_scale).astype(qty.dtype)
+
+    # Report sales in date order, portions of a sale in the order their lots were bought
+    by_sell_date = np.argsort(sell_rows, kind='stable')
+    sell_rows = sell_rows[by_sell_date]
+    buy_rows = buy_rows[by_sell_date]
+    portion_qty = portion_qty[by_sell_date]
+
+    # 3. Prepare Realized Gains Report
+    # Reports are built straight from the column arrays; copy=False keeps pandas
+    # from copying each one into a consolidated block
+    sell_price = price[sell_rows]
+    sell_fee = fee_per_share[sell_rows]
+    buy_cost = cost_per_share[buy_rows]
+    proceeds = portion_qty * (sell_price - sell_fee)
+    cost_basis = portion_qty * buy_cost
+    profit_loss = proceeds - cost_basis
+
+    sales_df = pd.DataFrame({
+        'Sell Date': dates[sell_rows],
+        'Code': codes[code_ids[sell_rows]],
+        'Quantity Sold': portion_qty,
+        'Sell Price': sell_price,
+        'Proceeds': _round_cents(proceeds),
+        'Acquisition Date': dates[buy_rows],
+        'Cost Basis per Share': _round_cents(buy_cost),
+        'Total Cost Basis': _round_cents(cost_basis),
+        'Profit/Loss': _round_cents(profit_loss)
+    }, copy=False)
+
+    # 4. Prepare Remaining Holdings Report
+    still_held = lot_remaining > 0 # Ensure we only report lots with shares left
+    lot_rows = lot_rows[still_held]
+
+    holdings_df = pd.DataFrame({
+        'Code': codes[code_ids[lot_rows]],
+        'Remaining Quantity': lot_remaining[still_held],
+        'Acquisition Date': dates[lot_rows],
+        'Cost Basis per Share': _round_cents(cost_per_share[lot_rows])
+    }, copy=False)
 
     return sales_df, holdings_df
 
@@ -127,21 +321,54 @@ class FifoCalculatorApp:
         self.status_var.set("Status: Waiting for file...")
         self.status_label = ttk.Label(self.main_frame, textvariable=self.status_var, font=("Helvetica", 10, "italic"))
         self.status_label.pack(pady=20)
+        self.results_q = queue.Queue()
 
     def run_full_process(self):
         file_path = self.select_input_file()
         if not file_path:
             return
 
+        # Reading and calculating run on a worker thread so the window keeps redrawing.
+        # The worker reports progress and results through results_q, polled from here
+        self.import_button.config(state=tk.DISABLED)
+        self.status_var.set("Status: Reading file...")
+        # Daemon threads let the process exit when the window is closed mid-job
+        threading.Thread(target=self.process_file, args=(file_path,), daemon=True).start()
+        self.root.after(50, self.poll_results)
+
+    def process_file(self, file_path):
+        # Runs on the worker thread, so it only posts messages and never touches Tk
         try:
-            self.status_var.set("Status: Reading file...")
-            self.root.update_idletasks()
             df = self.read_transaction_file(file_path)
-
-            self.status_var.set("Status: Processing FIFO calculations...")
-            self.root.update_idletasks()
+            self.results_q.put(('status', f"Status: Loaded {os.path.basename(file_path)}. Processing FIFO calculations..."))
             sales_df, holdings_df = calculate_fifo_profit_loss(df)
+            self.results_q.put(('done', sales_df, holdings_df))
+        except Exception as e:
+            self.results_q.put(('error', e))
+
+    def poll_results(self):
+        while True:
+            try:
+                kind, *payload = self.results_q.get_nowait()
+            except queue.Empty:
+                self.root.after(50, self.poll_results)
+                return
+            if kind != 'status':
+                break
+            self.status_var.set(payload[0])
 
+        self.import_button.config(state=tk.NORMAL)
+        if kind == 'error':
+            messagebox.showerror("Error", f"An error occurred: {payload[0]}")
+            self.status_var.set(f"Status: Error - {payload[0]}")
+            return
+        if kind == 'done':
+            self.finish_process(*payload)
+        else:
+            self.finish_save(*payload)
+
+    def finish_process(self, sales_df, holdings_df):
+        try:
             if sales_df.empty and holdings_df.empty:
                 messagebox.showinfo("No Data", "The input file did not contain valid transaction data.")
                 self.status_var.set("Status: Done. No data to process.")
@@ -159,19 +386,40 @@ class FifoCalculatorApp:
         return filedialog.askopenfilename(title="Select Transaction File", filetypes=(("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("All files", "*.*")))
 
     def read_transaction_file(self, file_path):
+        # Only the columns used by the calculation are parsed; any extras are skipped.
+        # Headers are matched after trimming and title-casing, so " quantity" still counts
+        required_columns = ['Date', 'Type', 'Code', 'Quantity', 'Price', 'Fees']
+        usecols = lambda column: str(column).strip().title() in required_columns
+        # Codes and types repeat on nearly every row, so store them as categories
+        dtype = {'Code': 'category', 'Type': 'category'}
         if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
+            try:
+                # PyArrow's multi-threaded parser is much faster on large files
+                df = pd.read_csv(file_path, engine='pyarrow', usecols=required_columns, dtype=dtype)
+            except (ImportError, KeyError, ValueError): # pyarrow missing, a column missing, or a file it can't parse
+                df = pd.read_csv(file_path, usecols=usecols, dtype=dtype)
         elif file_path.endswith('.xlsx'):
-            df = pd.read_excel(file_path)
+            try:
+                # The Rust-based calamine reader is several times faster than openpyxl
+                df = pd.read_excel(file_path, engine='calamine', usecols=usecols, dtype=dtype)
+            except (ImportError, ValueError): # python-calamine missing, or a pandas without the engine
+                df = pd.read_excel(file_path, usecols=usecols, dtype=dtype)
         else:
             raise ValueError("Unsupported file type.")
-        
-        required_columns = {'Date', 'Type', 'Code', 'Quantity', 'Price', 'Fees'}
-        if not required_columns.issubset(df.columns):
-            missing = required_columns - set(df.columns)
+
+        # Renaming through a dict touches only the few header strings
+        df = df.rename(columns={column: str(column).strip().title() for column in df.columns})
+        missing = set(required_columns) - set(df.columns)
+        if missing:
             raise ValueError(f"Input file missing required columns: {', '.join(missing)}")
-            
-        self.status_var.set(f"Status: Loaded {os.path.basename(file_path)}")
+
+        # Amounts exported as text, e.g. "$1,250.00", are stripped with a plain character
+        # translation rather than a regex, then converted to numbers
+        strip_symbols = str.maketrans('', '', '$,')
+        for column in ['Quantity', 'Price', 'Fees']:
+            if not pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = pd.to_numeric(df[column].astype(str).str.translate(strip_symbols))
+
         return df
 
     def save_output_files(self, sales_df, holdings_df):
@@ -190,17 +438,33 @@ class FifoCalculatorApp:
         sales_path = f"{base}_sales_report.csv"
         holdings_path = f"{base}_holdings_report.csv"
 
-        saved_files = []
-        # Save the detailed sales report if it has data
-        if not sales_df.empty:
-            sales_df.to_csv(sales_path, index=False)
-            saved_files.append(os.path.basename(sales_path))
-        
-        # Save the remaining holdings report if it has data
-        if not holdings_df.empty:
-            holdings_df.to_csv(holdings_path, index=False)
-            saved_files.append(os.path.basename(holdings_path))
+        # Writing also runs on the worker thread, so large exports don't freeze the window
+        self.import_button.config(state=tk.DISABLED)
+        self.status_var.set("Status: Saving reports...")
+        threading.Thread(
+            target=self.write_output_files, args=(sales_df, holdings_df, sales_path, holdings_path), daemon=True
+        ).start()
+        self.root.after(50, self.poll_results)
+
+    def write_output_files(self, sales_df, holdings_df, sales_path, holdings_path):
+        # Runs on the worker thread, so it only posts messages and never touches Tk
+        try:
+            saved_files = []
+            # Save the detailed sales report if it has data
+            if not sales_df.empty:
+                sales_df.to_csv(sales_path, index=False)
+                saved_files.append(os.path.basename(sales_path))
+
+            # Save the remaining holdings report if it has data
+            if not holdings_df.empty:
+                holdings_df.to_csv(holdings_path, index=False)
+                saved_files.append(os.path.basename(holdings_path))
 
+            self.results_q.put(('saved', saved_files))
+        except Exception as e:
+            self.results_q.put(('error', e))
+
+    def finish_save(self, saved_files):
         if not saved_files:
             messagebox.showinfo("No Reports Generated", "No sales were made and no holdings remain based on the data.")
             self.status_var.set("Status: Done. No reports to save.")
@@ -209,7 +473,6 @@ class FifoCalculatorApp:
         messagebox.showinfo("Success", f"Reports successfully saved:\n\n" + "\n".join(saved_files))
         self.status_var.set("Status: Success! Reports exported.")
 
-
 if __name__ == "__main__":
     root = tk.Tk()
     app = FifoCalculatorApp(root)
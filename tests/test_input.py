@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fifo_calculator
+
+
+def read(path):
+    # read_transaction_file uses no widget state, so no Tk window is needed
+    app = fifo_calculator.FifoCalculatorApp.__new__(fifo_calculator.FifoCalculatorApp)
+    return app.read_transaction_file(str(path))
+
+
+def test_header_only_csv_gives_empty_reports(tmp_path):
+    path = tmp_path / 'transactions.csv'
+    path.write_text('Date,Type,Code,Quantity,Price,Fees\n')
+    sales, holdings = fifo_calculator.calculate_fifo_profit_loss(read(path))
+    assert sales.empty
+    assert holdings.empty
+
+
+def parsed(values):
+    return fifo_calculator._parse_dates(pd.Series(values)).dt.strftime('%Y-%m-%d').tolist()
+
+
+def test_iso_dates():
+    assert parsed(['2023-01-31', '2023-02-01']) == ['2023-01-31', '2023-02-01']
+
+
+def test_slash_dates_are_month_first_by_default():
+    assert parsed(['01/02/2023', '12/31/2023']) == ['2023-01-02', '2023-12-31']
+
+
+def test_slash_dates_are_day_first_when_a_later_field_is_over_12():
+    # The first value fits either order; only the second shows the file is day-first
+    assert parsed(['05/01/2023', '25/01/2023']) == ['2023-01-05', '2023-01-25']
+
+
+def test_datetime_column_is_used_as_is():
+    dates = pd.Series(pd.to_datetime(['2023-01-31', '2023-02-01']))
+    assert fifo_calculator._parse_dates(dates) is dates
@@ -0,0 +1,114 @@
+import os
+import sys
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fifo_calculator
+
+
+def reference_match(code_ids, is_buy, is_sell, qty):
+    """Plain deque FIFO walk, one transaction at a time."""
+    open_lots = defaultdict(deque)
+    portions = []
+    for row, code in enumerate(code_ids.tolist()):
+        if is_buy[row]:
+            open_lots[code].append([row, qty[row]])
+        elif is_sell[row]:
+            left = qty[row]
+            lots = open_lots[code]
+            while left > 0 and lots:
+                lot = lots[0]
+                match_quantity = min(left, lot[1])
+                portions.append((row, lot[0], match_quantity))
+                left -= match_quantity
+                lot[1] -= match_quantity
+                if lot[1] == 0:
+                    lots.popleft()
+    remaining = {lot[0]: lot[1] for lots in open_lots.values() for lot in lots}
+    return sorted(portions), remaining
+
+
+def normalise(result):
+    sell_rows, buy_rows, portion_qty, lot_rows, lot_remaining = result
+    portions = sorted(zip(sell_rows.tolist(), buy_rows.tolist(), portion_qty.tolist()))
+    remaining = {row: left for row, left in zip(lot_rows.tolist(), lot_remaining.tolist()) if left > 0}
+    return portions, remaining
+
+
+def make_case(n, n_codes, seed, parts=None):
+    rng = np.random.default_rng(seed)
+    code_ids = rng.integers(0, n_codes, n)
+    is_buy = rng.random(n) < 0.5
+    is_sell = ~is_buy & (rng.random(n) < 0.9)
+    qty = rng.integers(1, 40, n)
+    if parts:
+        qty = qty / parts
+    return code_ids, is_buy, is_sell, qty
+
+
+CASES = {
+    'int': make_case(500, 6, 0),
+    # Quarters of a share are exact in binary, so every matcher sees the same sums
+    'fractional': make_case(500, 6, 1, parts=4),
+    # Thirds are not, so sums depend on the order they are taken in
+    'thirds': make_case(500, 6, 2, parts=3),
+    'sells before any buy': (
+        np.array([0, 0, 0, 0, 0]),
+        np.array([False, False, True, False, True]),
+        np.array([True, True, False, True, False]),
+        np.array([5, 3, 4, 2, 6]),
+    ),
+    'code with only sells': (
+        np.array([0, 1, 0, 1, 2, 0]),
+        np.array([True, False, False, False, True, False]),
+        np.array([False, True, True, True, False, True]),
+        np.array([2.5, 1.0, 1.5, 4.0, 3.0, 2.0]),
+    ),
+}
+
+# calculate_fifo_profit_loss never hands these to _match_lots
+SEQUENTIAL_ONLY = {'thirds'}
+
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_matchers_agree_with_reference(name):
+    code_ids, is_buy, is_sell, qty = CASES[name]
+    expected = reference_match(code_ids, is_buy, is_sell, qty)
+    if name not in SEQUENTIAL_ONLY:
+        assert normalise(fifo_calculator._match_lots(code_ids, is_buy, is_sell, qty)) == expected
+    assert normalise(fifo_calculator._fifo_kernel(code_ids, is_buy, is_sell, qty)) == expected
+
+
+def run_report(rows):
+    df = pd.DataFrame(rows, columns=['Date', 'Type', 'Code', 'Quantity', 'Price', 'Fees'])
+    return fifo_calculator.calculate_fifo_profit_loss(df)
+
+
+def test_fractional_quantities_keep_their_precision():
+    sales, holdings = run_report([
+        ['2024-01-01', 'Buy', 'A', 0.123456, 10.0, 0.0],
+        ['2024-01-02', 'Sell', 'A', 0.1, 12.0, 0.0],
+        ['2024-01-03', 'Buy', 'B', 0.00004, 10.0, 0.0],
+    ])
+    assert sales['Quantity Sold'].tolist() == [0.1]
+    assert holdings['Remaining Quantity'].tolist() == [0.023456, 0.00004]
+
+
+def test_unscaled_quantities_take_the_sequential_walk_without_numba(monkeypatch):
+    monkeypatch.setattr(fifo_calculator, 'nb', None)
+    code_ids, is_buy, is_sell, qty = CASES['thirds']
+    sales, holdings = fifo_calculator.calculate_fifo_profit_loss(pd.DataFrame({
+        'Date': pd.date_range('2020-01-01', periods=len(qty)),
+        'Type': np.where(is_buy, 'Buy', np.where(is_sell, 'Sell', 'Split')),
+        'Code': np.array(list('ABCDEF'))[code_ids],
+        'Quantity': qty,
+        'Price': 10.0,
+        'Fees': 0.0,
+    }))
+    portions, remaining = reference_match(code_ids, is_buy, is_sell, qty)
+    assert sales['Quantity Sold'].tolist() == [quantity for _, _, quantity in portions]
+    assert sorted(holdings['Remaining Quantity']) == sorted(left for left in remaining.values() if left > 0)
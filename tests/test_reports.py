@@ -0,0 +1,18 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fifo_calculator
+
+
+def test_half_cents_round_like_python_round():
+    values = [2.675, 7.295, 1.005, -2.675, 0.125, 10.0]
+    assert fifo_calculator._round_cents(values).tolist() == [round(value, 2) for value in values]
+    assert fifo_calculator._round_cents([2.675, 7.295]).tolist() == [2.67, 7.29]
+
+
+def test_rounding_matches_python_round_on_many_values():
+    values = np.random.default_rng(0).integers(-10**6, 10**6, 20_000) / 1000
+    assert fifo_calculator._round_cents(values).tolist() == [round(value, 2) for value in values.tolist()]